@@ -23,7 +23,7 @@ __license__ = "MIT"
 from .hifca import HIFCAScraper
 from .hidta import HIDTAScraper
 from .merger import merge_datasets
-from .utils import setup_logging
+from .utils import setup_logging, prefetch_states, get_cache_dir
 
 import logging
 
@@ -59,7 +59,7 @@ def get_hifca(validate_layout=True, cache_dir=None):
     scraper = HIFCAScraper(validate_layout=validate_layout, cache_dir=cache_dir)
     df = scraper.scrape()
     
-    logger.info(f"✓ Retrieved {len(df)} HIFCA counties")
+    logger.info("✓ Retrieved %d HIFCA counties", len(df))
     
     return df
 
@@ -90,7 +90,7 @@ def get_hidta(validate_layout=True, cache_dir=None):
     scraper = HIDTAScraper(validate_layout=validate_layout, cache_dir=cache_dir)
     df = scraper.scrape()
     
-    logger.info(f"✓ Retrieved {len(df)} HIDTA counties")
+    logger.info("✓ Retrieved %d HIDTA counties", len(df))
     
     return df
 
@@ -120,6 +120,12 @@ def get_combined(validate_layout=True, cache_dir=None):
     
     logger.info("Fetching combined HIFCA and HIDTA data...")
     
+    # Fetch every needed state's counties up front, concurrently
+    states = set(HIFCAScraper.STATES)
+    for region_states in HIDTAScraper.HIDTA_REGIONS.values():
+        states.update(region_states)
+    prefetch_states(states, cache_dir=get_cache_dir(cache_dir))
+    
     # Get both datasets
     hifca_df = get_hifca(validate_layout=validate_layout, cache_dir=cache_dir)
     hidta_df = get_hidta(validate_layout=validate_layout, cache_dir=cache_dir)
@@ -127,10 +133,12 @@ def get_combined(validate_layout=True, cache_dir=None):
     # Merge
     combined_df = merge_datasets(hifca_df, hidta_df)
     
-    logger.info(f"✓ Retrieved {len(combined_df)} total counties")
-    logger.info(f"  HIFCA only: {len(combined_df[combined_df['hifca_hidta_flag'] == 'HIFCA'])}")
-    logger.info(f"  HIDTA only: {len(combined_df[combined_df['hifca_hidta_flag'] == 'HIDTA'])}")
-    logger.info(f"  Both: {len(combined_df[combined_df['hifca_hidta_flag'] == 'BOTH'])}")
+    flag_counts = combined_df['hifca_hidta_flag'].value_counts().to_dict()
+    
+    logger.info("✓ Retrieved %d total counties", len(combined_df))
+    logger.info("  HIFCA only: %d", flag_counts.get('HIFCA', 0))
+    logger.info("  HIDTA only: %d", flag_counts.get('HIDTA', 0))
+    logger.info("  Both: %d", flag_counts.get('BOTH', 0))
     
     return combined_df
 
@@ -150,10 +150,10 @@ Examples:
         output_path = Path(args.output)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        df.to_csv(output_path, index=False)
+        df.to_csv(output_path, index=False, lineterminator='\n')
         
         logger.info("=" * 70)
-        logger.info(f"✓ SUCCESS: Saved {len(df)} counties to {output_path}")
+        logger.info("✓ SUCCESS: Saved %d counties to %s", len(df), output_path)
         logger.info("=" * 70)
         
         # Print summary
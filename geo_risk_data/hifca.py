@@ -3,18 +3,27 @@ HIFCA data scraper with layout validation
 """
 
 import logging
+import re
 import pandas as pd
 from bs4 import BeautifulSoup
 import io
+from functools import partial
+from urllib.parse import urljoin
 
 from .utils import (
     fetch_census_counties, get_current_date, fetch_url,
-    create_county_dict, get_cache_dir
+    new_county_columns, append_county, get_cache_dir
 )
 from .validators import LayoutValidator, validate_county_data
 
 logger = logging.getLogger(__name__)
 
+# County names in the Southwest Border PDF, e.g. "Santa Cruz County"
+_CTY_RE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+County')
+
+# Keywords identifying the Southwest Border PDF link
+_SW_BORDER_RE = re.compile(r'southwest|southern|border', re.IGNORECASE)
+
 
 class HIFCAScraper:
     """
@@ -26,6 +35,25 @@ class HIFCAScraper:
     SOURCE_URL = 'https://www.fincen.gov/hifca-regional-map'
     SW_BORDER_PDF_URL = 'https://www.fincen.gov/system/files/shared/southernborder.pdf'
     
+    # States whose Census county lists are needed to build HIFCA regions
+    STATES = ('AZ', 'TX', 'CA', 'IL', 'NY', 'NJ', 'PR', 'VI', 'FL')
+    
+    # County allow-lists for HIFCA regions that cover part of a state
+    _CA_NORTH = frozenset({
+        'Monterey', 'Humboldt', 'Mendocino', 'Lake', 'Sonoma', 'Napa',
+        'Marin', 'Contra Costa', 'San Francisco', 'San Mateo', 'Alameda',
+        'Santa Cruz', 'San Benito', 'Del Norte'
+    })
+    _CA_SOUTH = frozenset({
+        'Los Angeles', 'Orange', 'Riverside', 'San Bernardino',
+        'San Luis Obispo', 'Santa Barbara', 'Ventura'
+    })
+    _CHICAGO = frozenset({'Cook', 'McHenry', 'DuPage', 'Lake', 'Will', 'Kane'})
+    _SOUTH_FL = frozenset({
+        'Broward', 'Miami-Dade', 'Indian River', 'Martin',
+        'Monroe', 'Okeechobee', 'Palm Beach', 'St. Lucie'
+    })
+    
     def __init__(self, validate_layout=True, cache_dir=None):
         """
         Initialize HIFCA scraper.
@@ -45,12 +73,17 @@ class HIFCAScraper:
         Returns:
             pandas.DataFrame with HIFCA county data
         """
-        logger.info(f"Starting HIFCA extraction from {self.SOURCE_URL}")
+        logger.info("Starting HIFCA extraction from %s", self.SOURCE_URL)
         
-        all_counties = []
+        columns = new_county_columns(include_tier=True)
+        # Bind per-run invariants once; each call appends one county row
+        add_county = partial(
+            append_county, columns,
+            source_url=self.SOURCE_URL, extracted_date=get_current_date(), seen=set()
+        )
         
         # Fetch and validate main page
-        response = fetch_url(self.SOURCE_URL)
+        response = fetch_url(self.SOURCE_URL, cache_dir=self.cache_dir)
         
         if self.validate_layout:
             logger.info("Validating page layout...")
@@ -58,45 +91,38 @@ class HIFCAScraper:
         
         # Extract PDF URLs from page
         pdf_urls = self._extract_pdf_urls(response.text)
-        logger.info(f"Found {len(pdf_urls)} PDF links on page")
+        logger.info("Found %d PDF links on page", len(pdf_urls))
         
         # Get Southwest Border data with tiers
         logger.info("Processing Southwest Border counties...")
         sw_data = self._get_sw_border_data(pdf_urls)
         
         # Arizona
+        by_name = {c['county_name']: c for c in fetch_census_counties('AZ', cache_dir=self.cache_dir)}
         for county_name, tier in sw_data.get('AZ', {}).items():
-            counties = fetch_census_counties('AZ')
-            for c in counties:
-                if c['county_name'] == county_name:
-                    county = create_county_dict(
-                        c, tier=tier, source_url=self.SOURCE_URL
-                    )
-                    all_counties.append(county)
-                    logger.debug(f"  AZ: {county_name} ({tier})")
+            c = by_name.get(county_name)
+            if c is not None:
+                add_county(c, tier=tier)
+                logger.debug("  AZ: %s (%s)", county_name, tier)
         
         # Texas
+        by_name = {c['county_name']: c for c in fetch_census_counties('TX', cache_dir=self.cache_dir)}
         for county_name, tier in sw_data.get('TX', {}).items():
-            counties = fetch_census_counties('TX')
-            for c in counties:
-                if c['county_name'] == county_name:
-                    county = create_county_dict(
-                        c, tier=tier, source_url=self.SOURCE_URL
-                    )
-                    all_counties.append(county)
-                    logger.debug(f"  TX: {county_name} ({tier})")
+            c = by_name.get(county_name)
+            if c is not None:
+                add_county(c, tier=tier)
+                logger.debug("  TX: %s (%s)", county_name, tier)
         
         # California districts
         logger.info("Processing California districts...")
-        all_counties.extend(self._get_california_counties())
+        self._add_california_counties(add_county)
         
         # Other regions
         logger.info("Processing other HIFCA regions...")
-        all_counties.extend(self._get_other_regions())
+        self._add_other_regions(add_county)
         
         # Create DataFrame
-        df = pd.DataFrame(all_counties)
-        df = df.drop_duplicates(subset=['county_fips'])
+        df = pd.DataFrame(columns, copy=False)
         
         # Validate extracted data
         validate_county_data(
@@ -105,35 +131,30 @@ class HIFCAScraper:
             expected_columns=['state_id', 'county_fips', 'county_name', 'source_url', 'last_extracted_date']
         )
         
-        logger.info(f"✓ Extracted {len(df)} HIFCA counties")
+        logger.info("✓ Extracted %d HIFCA counties", len(df))
         
         # Log tier breakdown
         if 'hifca_tier' in df.columns:
             tier_counts = df['hifca_tier'].value_counts(dropna=False)
-            logger.info(f"  Tier breakdown: {tier_counts.to_dict()}")
+            logger.info("  Tier breakdown: %s", tier_counts.to_dict())
         
         return df
     
     def _extract_pdf_urls(self, html_content):
         """Extract PDF URLs from page."""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         pdf_urls = {}
         
-        for link in soup.find_all('a', href=True):
+        for link in soup.select('a[href*=".pdf" i]'):
             href = link['href']
-            if '.pdf' in href.lower():
-                # Make absolute URL
-                if href.startswith('/'):
-                    pdf_url = 'https://www.fincen.gov' + href
-                elif not href.startswith('http'):
-                    pdf_url = 'https://www.fincen.gov/' + href
-                else:
-                    pdf_url = href
-                
-                # Categorize by keywords
-                if 'southwest' in href.lower() or 'southern' in href.lower() or 'border' in href.lower():
-                    pdf_urls['Southwest Border'] = pdf_url
-                    logger.debug(f"  Found SW Border PDF: {pdf_url}")
+            
+            # Make absolute URL
+            pdf_url = urljoin('https://www.fincen.gov/', href)
+            
+            # Categorize by keywords
+            if _SW_BORDER_RE.search(href):
+                pdf_urls['Southwest Border'] = pdf_url
+                logger.debug("  Found SW Border PDF: %s", pdf_url)
         
         return pdf_urls
     
@@ -148,64 +169,87 @@ class HIFCAScraper:
         if 'Southwest Border' in pdf_urls:
             try:
                 pdf_url = pdf_urls['Southwest Border']
-                logger.info(f"Parsing PDF: {pdf_url}")
+                logger.info("Parsing PDF: %s", pdf_url)
                 
-                response = fetch_url(pdf_url, timeout=60)
+                response = fetch_url(pdf_url, timeout=60, cache_dir=self.cache_dir)
                 
-                # Try pdfplumber
                 try:
-                    import pdfplumber
-                    
-                    with pdfplumber.open(io.BytesIO(response.content)) as pdf:
-                        text = "\n".join(page.extract_text() for page in pdf.pages)
-                    
-                    logger.debug(f"  Extracted {len(text)} chars from PDF")
-                    parsed_data = self._parse_sw_border_text(text)
+                    parsed_data = self._parse_sw_border_pdf(response.content)
                     
                     if parsed_data['TX'] or parsed_data['AZ']:
                         logger.info("  ✓ Successfully parsed PDF")
                         return parsed_data
                 
                 except ImportError:
-                    logger.warning("  pdfplumber not installed, using fallback data")
+                    logger.warning("  pypdfium2/pdfplumber not installed, using fallback data")
                 
             except Exception as e:
-                logger.warning(f"  Failed to parse PDF: {str(e)}, using fallback")
+                logger.warning("  Failed to parse PDF: %s, using fallback", e)
         
         # Fallback to known data
         logger.info("  Using fallback Southwest Border data")
         return self._get_sw_border_fallback()
     
-    def _parse_sw_border_text(self, text):
-        """Parse PDF text for Southwest Border counties."""
-        import re
+    def _parse_sw_border_pdf(self, content):
+        """
+        Extract page texts from the Southwest Border PDF and parse them.
+        
+        Uses pypdfium2 for plain text extraction when available, falling
+        back to pdfplumber. Pages are extracted lazily, one at a time.
+        
+        Raises:
+            ImportError: If neither pypdfium2 nor pdfplumber is installed
+        """
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            pdfium = None
+        
+        if pdfium is not None:
+            with pdfium.PdfDocument(content) as pdf:
+                page_texts = (page.get_textpage().get_text_range() for page in pdf)
+                return self._parse_sw_border_text(page_texts)
+        
+        import pdfplumber
+        
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            page_texts = (page.extract_text() or '' for page in pdf.pages)
+            return self._parse_sw_border_text(page_texts)
+    
+    def _parse_sw_border_text(self, page_texts):
+        """
+        Parse PDF text for Southwest Border counties.
         
+        Args:
+            page_texts: Iterable of page text strings, in page order; the
+                current tier and state carry over from one page to the next
+        """
         result = {'AZ': {}, 'TX': {}}
-        lines = text.split('\n')
         
         current_tier = None
         current_state = None
         
-        for line in lines:
-            line_lower = line.lower()
-            
-            # Detect tier
-            if 'tier i' in line_lower or 'tier 1' in line_lower:
-                current_tier = 'Tier I'
-            elif 'tier ii' in line_lower or 'tier 2' in line_lower:
-                current_tier = 'Tier II'
-            
-            # Detect state
-            if 'texas' in line_lower:
-                current_state = 'TX'
-            elif 'arizona' in line_lower:
-                current_state = 'AZ'
-            
-            # Extract counties
-            match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+County', line)
-            if match and current_tier and current_state:
-                county_name = match.group(1)
-                result[current_state][county_name] = current_tier
+        for text in page_texts:
+            for line in text.splitlines():
+                line_lower = line.lower()
+                
+                # Detect tier
+                if 'tier i' in line_lower or 'tier 1' in line_lower:
+                    current_tier = 'Tier I'
+                elif 'tier ii' in line_lower or 'tier 2' in line_lower:
+                    current_tier = 'Tier II'
+                
+                # Detect state
+                if 'texas' in line_lower:
+                    current_state = 'TX'
+                elif 'arizona' in line_lower:
+                    current_state = 'AZ'
+                
+                # Extract counties
+                match = _CTY_RE.search(line)
+                if match and current_tier and current_state:
+                    county_name = match.group(1)
+                    result[current_state][county_name] = current_tier
         
         return result if (result['TX'] or result['AZ']) else self._get_sw_border_fallback()
     
@@ -230,62 +274,47 @@ class HIFCAScraper:
             }
         }
     
-    def _get_california_counties(self):
-        """Get California district counties."""
-        ca_north = ['Monterey', 'Humboldt', 'Mendocino', 'Lake', 'Sonoma', 'Napa',
-                    'Marin', 'Contra Costa', 'San Francisco', 'San Mateo', 'Alameda',
-                    'Santa Cruz', 'San Benito', 'Del Norte']
-        ca_south = ['Los Angeles', 'Orange', 'Riverside', 'San Bernardino',
-                    'San Luis Obispo', 'Santa Barbara', 'Ventura']
-        
-        counties = []
-        ca_all = fetch_census_counties('CA')
+    def _add_california_counties(self, add_county):
+        """Add California district counties via the add_county callback."""
+        added = 0
+        ca_all = fetch_census_counties('CA', cache_dir=self.cache_dir)
         
         for c in ca_all:
-            if c['county_name'] in ca_north:
-                counties.append(create_county_dict(
-                    c, tier='Northern District', source_url=self.SOURCE_URL
-                ))
-            elif c['county_name'] in ca_south:
-                counties.append(create_county_dict(
-                    c, tier='Southern District', source_url=self.SOURCE_URL
-                ))
-        
-        logger.debug(f"  CA: {len(counties)} counties")
-        return counties
+            if c['county_name'] in self._CA_NORTH:
+                added += add_county(c, tier='Northern District')
+            elif c['county_name'] in self._CA_SOUTH:
+                added += add_county(c, tier='Southern District')
+        
+        logger.debug("  CA: %d counties", added)
     
-    def _get_other_regions(self):
-        """Get other HIFCA region counties."""
-        counties = []
+    def _add_other_regions(self, add_county):
+        """Add other HIFCA region counties via the add_county callback."""
+        added = 0
         
         # Chicago
-        chicago = ['Cook', 'McHenry', 'DuPage', 'Lake', 'Will', 'Kane']
-        for c in fetch_census_counties('IL'):
-            if c['county_name'] in chicago:
-                counties.append(create_county_dict(c, source_url=self.SOURCE_URL))
+        for c in fetch_census_counties('IL', cache_dir=self.cache_dir):
+            if c['county_name'] in self._CHICAGO:
+                added += add_county(c)
         
         # New York (ALL)
-        for c in fetch_census_counties('NY'):
-            counties.append(create_county_dict(c, source_url=self.SOURCE_URL))
+        for c in fetch_census_counties('NY', cache_dir=self.cache_dir):
+            added += add_county(c)
         
         # New Jersey (ALL)
-        for c in fetch_census_counties('NJ'):
-            counties.append(create_county_dict(c, source_url=self.SOURCE_URL))
+        for c in fetch_census_counties('NJ', cache_dir=self.cache_dir):
+            added += add_county(c)
         
         # Puerto Rico (ALL)
-        for c in fetch_census_counties('PR'):
-            counties.append(create_county_dict(c, source_url=self.SOURCE_URL))
+        for c in fetch_census_counties('PR', cache_dir=self.cache_dir):
+            added += add_county(c)
         
         # Virgin Islands (ALL)
-        for c in fetch_census_counties('VI'):
-            counties.append(create_county_dict(c, source_url=self.SOURCE_URL))
+        for c in fetch_census_counties('VI', cache_dir=self.cache_dir):
+            added += add_county(c)
         
         # South Florida
-        south_fl = ['Broward', 'Miami-Dade', 'Indian River', 'Martin',
-                    'Monroe', 'Okeechobee', 'Palm Beach', 'St. Lucie']
-        for c in fetch_census_counties('FL'):
-            if c['county_name'] in south_fl:
-                counties.append(create_county_dict(c, source_url=self.SOURCE_URL))
-        
-        logger.debug(f"  Other regions: {len(counties)} counties")
-        return counties
+        for c in fetch_census_counties('FL', cache_dir=self.cache_dir):
+            if c['county_name'] in self._SOUTH_FL:
+                added += add_county(c)
+        
+        logger.debug("  Other regions: %d counties", added)
@@ -3,10 +3,14 @@ Merge HIFCA and HIDTA datasets
 """
 
 import logging
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Possible values of the combined hifca_hidta_flag column
+FLAG_CATEGORIES = ['BOTH', 'HIFCA', 'HIDTA', 'NONE']
+
 
 def merge_datasets(hifca_df, hidta_df):
     """
@@ -21,59 +25,42 @@ def merge_datasets(hifca_df, hidta_df):
     """
     logger.info("Merging HIFCA and HIDTA datasets...")
     
-    # Add flags
-    hifca_df = hifca_df.copy()
-    hidta_df = hidta_df.copy()
-    
-    hifca_df['hifca_flag'] = 1
-    hidta_df['hidta_flag'] = 1
-    
-    # Merge on county_fips - full outer join
+    # Merge on county_fips - full outer join; _merge records which side(s)
+    # each county came from
     merged = pd.merge(
         hifca_df,
         hidta_df,
         on='county_fips',
         how='outer',
-        suffixes=('', '_hidta')
+        suffixes=('', '_hidta'),
+        indicator=True,
+        validate='one_to_one'
     )
     
-    # Fill in missing state info from either side
-    if 'state_id_hidta' in merged.columns:
-        merged['state_id'] = merged['state_id'].fillna(merged['state_id_hidta'])
-        merged['state_name'] = merged['state_name'].fillna(merged['state_name_hidta'])
-        merged['county_name'] = merged['county_name'].fillna(merged['county_name_hidta'])
-        
-        # Drop duplicate columns
-        cols_to_drop = [col for col in merged.columns if col.endswith('_hidta')]
-        merged = merged.drop(columns=cols_to_drop)
-    
-    # Fill in last_extracted_date from either side
-    if 'last_extracted_date_hidta' in merged.columns:
-        merged['last_extracted_date'] = merged['last_extracted_date'].fillna(
-            merged['last_extracted_date_hidta']
+    # Coalesce shared columns (state info, names, source URL, extraction
+    # date) from the HIDTA side in one pass
+    hidta_cols = merged.columns[merged.columns.str.endswith('_hidta')].tolist()
+    if hidta_cols:
+        base_cols = [col[:-len('_hidta')] for col in hidta_cols]
+        merged[base_cols] = merged[base_cols].fillna(
+            merged[hidta_cols].set_axis(base_cols, axis=1)
         )
     
-    # Fill NaN flags
-    merged['hifca_flag'] = merged['hifca_flag'].fillna(0).astype(int)
-    merged['hidta_flag'] = merged['hidta_flag'].fillna(0).astype(int)
-    
-    # Create combined flag
-    merged['hifca_hidta_flag'] = merged.apply(
-        lambda row: 'BOTH' if (row['hifca_flag'] == 1 and row['hidta_flag'] == 1)
-                    else 'HIFCA' if row['hifca_flag'] == 1
-                    else 'HIDTA' if row['hidta_flag'] == 1
-                    else 'NONE',
-        axis=1
-    )
-    
-    # Combine source URLs
     if 'source_url' in merged.columns:
-        merged['source_url'] = merged.apply(
-            lambda row: row.get('source_url', '') if pd.notna(row.get('source_url'))
-                        else row.get('source_url_hidta', '') if pd.notna(row.get('source_url_hidta'))
-                        else '',
-            axis=1
-        )
+        merged['source_url'] = merged['source_url'].fillna('')
+    
+    # Derive flags from the merge indicator
+    source = merged['_merge']
+    merged['hifca_flag'] = (source != 'right_only').astype(np.int8)
+    merged['hidta_flag'] = (source != 'left_only').astype(np.int8)
+    
+    # Combined flag: relabel the indicator's categories
+    merged['hifca_hidta_flag'] = source.cat.rename_categories(
+        {'both': 'BOTH', 'left_only': 'HIFCA', 'right_only': 'HIDTA'}
+    ).cat.set_categories(FLAG_CATEGORIES)
+    
+    # Drop the HIDTA duplicates and the indicator together
+    merged.drop(columns=hidta_cols + ['_merge'], inplace=True)
     
     # Reorder columns
     base_cols = ['state_id', 'state_name', 'county_fips', 'county_name']
@@ -90,13 +77,23 @@ def merge_datasets(hifca_df, hidta_df):
     
     merged = merged[column_order]
     
-    # Sort
-    merged = merged.sort_values(['state_id', 'county_name']).reset_index(drop=True)
+    # Small fixed vocabularies: store as categoricals (sorting compares codes)
+    merged['state_id'] = merged['state_id'].astype('category')
+    merged['state_name'] = merged['state_name'].astype('category')
+    
+    # Sort by state, then county name (lexsort's last key is the primary one)
+    order = np.lexsort((
+        merged['county_name'].to_numpy(),
+        merged['state_id'].cat.codes.to_numpy(),
+    ))
+    merged = merged.iloc[order].reset_index(drop=True)
     
     # Log summary
-    logger.info(f"✓ Merge complete: {len(merged)} total counties")
-    logger.info(f"  HIFCA only: {len(merged[merged['hifca_hidta_flag'] == 'HIFCA'])}")
-    logger.info(f"  HIDTA only: {len(merged[merged['hifca_hidta_flag'] == 'HIDTA'])}")
-    logger.info(f"  Both: {len(merged[merged['hifca_hidta_flag'] == 'BOTH'])}")
+    flag_counts = merged['hifca_hidta_flag'].value_counts()
+    
+    logger.info("✓ Merge complete: %d total counties", len(merged))
+    logger.info("  HIFCA only: %d", flag_counts.get('HIFCA', 0))
+    logger.info("  HIDTA only: %d", flag_counts.get('HIDTA', 0))
+    logger.info("  Both: %d", flag_counts.get('BOTH', 0))
     
     return merged
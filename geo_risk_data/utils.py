@@ -3,9 +3,42 @@ Shared utilities for geo-risk-data package
 """
 
 import requests
+import hashlib
+import json
 import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def _create_session():
+    """Create a pooled HTTP session that retries on throttling and server errors."""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared session so repeated requests to the same host reuse connections
+_SESSION = _create_session()
 
 # State mappings
 STATE_FIPS = {
@@ -20,22 +53,22 @@ STATE_FIPS = {
     'WI': '55', 'WY': '56', 'DC': '11', 'PR': '72', 'VI': '78'
 }
 
-STATE_NAMES = {code: name for name, code in {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR',
-    'California': 'CA', 'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE',
-    'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID',
-    'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS',
-    'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS',
-    'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
-    'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM', 'New York': 'NY',
-    'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK',
-    'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
-    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT',
-    'Vermont': 'VT', 'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV',
-    'Wisconsin': 'WI', 'Wyoming': 'WY', 'District of Columbia': 'DC',
-    'Puerto Rico': 'PR', 'Virgin Islands': 'VI'
-}.items()}
+STATE_NAMES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho',
+    'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island',
+    'SC': 'South Carolina', 'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas',
+    'UT': 'Utah', 'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington',
+    'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+    'DC': 'District of Columbia', 'PR': 'Puerto Rico', 'VI': 'Virgin Islands'
+}
 
 
 def setup_logging(level=logging.INFO):
@@ -91,13 +124,13 @@ def get_cache_dir(cache_dir=None):
     state_name = STATE_NAMES.get(state_code)
     
     if not state_fips:
-        logger.warning(f"Unknown state code: {state_code}")
+        logger.warning("Unknown state code: %s", state_code)
         return []
     
     url = f"https://api.census.gov/data/2020/dec/pl?get=NAME&for=county:*&in=state:{state_fips}"
     
     try:
-        logger.debug(f"Fetching counties for {state_code} from Census API...")
+        logger.debug("Fetching counties for %s from Census API...", state_code)
         response = requests.get(url, timeout=timeout)
         response.raise_for_status()
         
@@ -105,8 +138,8 @@ def get_cache_dir(cache_dir=None):
         try:
             data = response.json()
         except ValueError as e:
-            logger.warning(f"Invalid JSON response for {state_code}: {str(e)}")
-            logger.debug(f"Response content: {response.text[:200]}")
+            logger.warning("Invalid JSON response for %s: %s", state_code, e)
+            logger.debug("Response content: %s", response.text[:200])
             return []
         
         counties = []
@@ -125,14 +158,14 @@ def get_cache_dir(cache_dir=None):
                 'county_name': county_name
             })
         
-        logger.debug(f"✓ Retrieved {len(counties)} counties for {state_code}")
+        logger.debug("✓ Retrieved %d counties for %s", len(counties), state_code)
         return counties
         
     except requests.RequestException as e:
-        logger.warning(f"Census API request failed for {state_code}: {str(e)}")
+        logger.warning("Census API request failed for %s: %s", state_code, e)
         return []  # Return empty list instead of raising
     except (KeyError, IndexError) as e:
-        logger.warning(f"Failed to parse Census API response for {state_code}: {str(e)}")
+        logger.warning("Failed to parse Census API response for %s: %s", state_code, e)
         return []
 
   # Expected county counts for validation
@@ -149,96 +182,153 @@ EXPECTED_COUNTY_COUNTS = {
 }
 
 
-def fetch_census_counties(state_code, timeout=30):
+# Census county lists already fetched in this process, keyed by state code
+_COUNTY_CACHE = {}
+
+
+def fetch_census_counties(state_code, timeout=30, cache_dir=None):
     """
     Fetch all counties for a state from Census Bureau API.
     
+    Results are cached per state for the lifetime of the process, so
+    repeated lookups (e.g. FL across three HIDTA regions) only hit the
+    API once. Failed fetches are not cached.
+    
     Args:
         state_code: 2-letter state code
         timeout: Request timeout in seconds
+        cache_dir: Optional directory for the on-disk HTTP cache
         
     Returns:
         List of dicts with county information
+    """
+    counties = _COUNTY_CACHE.get(state_code)
+    if counties is None:
+        counties = _request_census_counties(state_code, timeout, cache_dir)
+        if counties:
+            _COUNTY_CACHE[state_code] = counties
+    return counties
+
+
+def clear_census_cache():
+    """Clear cached Census county lists."""
+    _COUNTY_CACHE.clear()
+
+
+def prefetch_states(state_codes, max_workers=16, cache_dir=None):
+    """
+    Fetch Census county lists for several states concurrently.
+    
+    Populates the fetch_census_counties cache so that later per-state
+    lookups are served from memory.
+    
+    Args:
+        state_codes: Iterable of 2-letter state codes
+        max_workers: Maximum number of concurrent requests
+        cache_dir: Optional directory for the on-disk HTTP cache
+    """
+    pending = [code for code in set(state_codes) if code not in _COUNTY_CACHE]
+    if not pending:
+        return
+    
+    logger = logging.getLogger(__name__)
+    logger.debug("Prefetching counties for %d states...", len(pending))
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        list(executor.map(partial(fetch_census_counties, cache_dir=cache_dir), pending))
+
+
+def fetch_all_census_counties(state_codes=None, max_workers=16, cache_dir=None):
+    """
+    Fetch Census county lists for several states concurrently.
+    
+    Args:
+        state_codes: Iterable of 2-letter state codes (default: all in STATE_FIPS)
+        max_workers: Maximum number of concurrent requests
+        cache_dir: Optional directory for the on-disk HTTP cache
         
-    Raises:
-        requests.RequestException: If Census API request fails
+    Returns:
+        Dict mapping state code to list of county dicts (copies, safe to
+        modify); states whose fetch failed map to an empty list
     """
+    if state_codes is None:
+        state_codes = STATE_FIPS
+    state_codes = list(dict.fromkeys(state_codes))
+    
+    prefetch_states(state_codes, max_workers=max_workers, cache_dir=cache_dir)
+    
+    # Read back from the cache only: failed states are not cached, and
+    # fetching them again here would retry each one serially
+    return {
+        code: [dict(county) for county in _COUNTY_CACHE.get(code, ())]
+        for code in state_codes
+    }
+
+
+def _request_census_counties(state_code, timeout=30, cache_dir=None):
+    """Fetch all counties for a state from the Census Bureau API (uncached)."""
     logger = logging.getLogger(__name__)
     
     state_fips = STATE_FIPS.get(state_code)
     state_name = STATE_NAMES.get(state_code)
     
     if not state_fips:
-        logger.warning(f"Unknown state code: {state_code}")
+        logger.warning("Unknown state code: %s", state_code)
         return []
     
     url = f"https://api.census.gov/data/2020/dec/pl?get=NAME&for=county:*&in=state:{state_fips}"
     
-    # Try Census API with retry
-    for attempt in range(3):
+    # Transient failures (connection errors, 429/5xx) are retried with
+    # backoff by the session's HTTPAdapter
+    try:
+        logger.debug("Fetching counties for %s from Census API...", state_code)
+        response = _conditional_get(url, timeout, cache_dir)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.error("Census API request failed for %s: %s", state_code, e)
+        return []
+    
+    # Parse JSON with error handling
+    try:
+        data = response.json()
+    except ValueError as e:
+        logger.warning("Invalid JSON response for %s: %s", state_code, e)
+        logger.debug("Response content: %s", response.text[:200])
+        return []
+    
+    # Parse counties
+    counties = []
+    state_suffix = ', ' + state_name
+    
+    for row in data[1:]:  # Skip header
         try:
-            logger.debug(f"Fetching counties for {state_code} from Census API (attempt {attempt + 1}/3)...")
-            response = requests.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            # Parse JSON with error handling
-            try:
-                data = response.json()
-            except ValueError as e:
-                if attempt < 2:  # Retry
-                    logger.debug(f"Invalid JSON for {state_code}, retrying...")
-                    import time
-                    time.sleep(1)
-                    continue
-                else:
-                    logger.warning(f"Invalid JSON response for {state_code}: {str(e)}")
-                    logger.debug(f"Response content: {response.text[:200]}")
-                    return []
-            
-            # Parse counties
-            counties = []
-            
-            for row in data[1:]:  # Skip header
-                try:
-                    county_name = row[0].replace(' County', '').replace(' Parish', '')
-                    if ', ' + state_name in county_name:
-                        county_name = county_name.replace(', ' + state_name, '')
-                    
-                    county_fips = state_fips + row[2]
-                    
-                    counties.append({
-                        'state_id': state_code,
-                        'state_name': state_name,
-                        'county_fips': county_fips,
-                        'county_name': county_name
-                    })
-                except (KeyError, IndexError) as e:
-                    logger.warning(f"Failed to parse county row for {state_code}: {row}")
-                    continue
-            
-            # Validate we got expected number of counties
-            expected = EXPECTED_COUNTY_COUNTS.get(state_code, 0)
-            if expected > 0 and len(counties) < expected:
-                logger.warning(
-                    f"Retrieved {len(counties)}/{expected} counties for {state_code} "
-                    f"(missing {expected - len(counties)})"
-                )
-            else:
-                logger.debug(f"✓ Retrieved {len(counties)} counties for {state_code}")
+            county_name = row[0].replace(' County', '').replace(' Parish', '')
+            if state_suffix in county_name:
+                county_name = county_name.replace(state_suffix, '')
             
-            return counties
+            county_fips = state_fips + row[2]
             
-        except requests.RequestException as e:
-            if attempt < 2:  # Retry
-                logger.debug(f"Request failed for {state_code}, retrying...")
-                import time
-                time.sleep(1)
-                continue
-            else:
-                logger.error(f"Census API request failed for {state_code} after 3 attempts: {str(e)}")
-                return []
+            counties.append({
+                'state_id': state_code,
+                'state_name': state_name,
+                'county_fips': county_fips,
+                'county_name': county_name
+            })
+        except (KeyError, IndexError) as e:
+            logger.warning("Failed to parse county row for %s: %s", state_code, row)
+            continue
     
-    return []
+    # Validate we got expected number of counties
+    expected = EXPECTED_COUNTY_COUNTS.get(state_code, 0)
+    if expected > 0 and len(counties) < expected:
+        logger.warning(
+            "Retrieved %d/%d counties for %s (missing %d)",
+            len(counties), expected, state_code, expected - len(counties)
+        )
+    else:
+        logger.debug("✓ Retrieved %d counties for %s", len(counties), state_code)
+    
+    return counties
 
     
 def get_current_date():
@@ -246,13 +336,114 @@ def get_current_date():
     return datetime.now().strftime('%Y-%m-%d')
 
 
-def fetch_url(url, timeout=30):
+def _http_cache_paths(url, cache_dir):
+    """Get (metadata, body) paths for a URL in the on-disk HTTP cache."""
+    url_hash = hashlib.md5(url.encode()).hexdigest()[:16]
+    cache_path = Path(cache_dir)
+    return cache_path / f"http_{url_hash}.json", cache_path / f"http_{url_hash}.body"
+
+
+def _atomic_write(path, data):
+    """Write bytes to path via a temporary file so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, str(path))
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _conditional_get(url, timeout=30, cache_dir=None):
+    """
+    GET a URL, revalidating against the on-disk HTTP cache if available.
+    
+    Sends If-None-Match/If-Modified-Since using the validators stored from
+    the last 200 response. On 304 Not Modified the cached body is returned
+    as a regular 200 response. Cache read/write errors are treated as a
+    cache miss and never fail the request.
+    
+    Args:
+        url: URL to fetch
+        timeout: Request timeout in seconds
+        cache_dir: Directory for the HTTP cache, or None to disable caching
+        
+    Returns:
+        requests.Response object
+    """
+    if cache_dir is None:
+        return _SESSION.get(url, timeout=timeout)
+    
+    logger = logging.getLogger(__name__)
+    meta_path, body_path = _http_cache_paths(url, cache_dir)
+    
+    meta = None
+    headers = {}
+    if meta_path.exists() and body_path.exists():
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except (ValueError, OSError):
+            meta = None
+    
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    
+    response = _SESSION.get(url, headers=headers, timeout=timeout)
+    
+    if response.status_code == 304 and meta:
+        try:
+            body = body_path.read_bytes()
+        except OSError as e:
+            logger.debug("Cached body unreadable for %s (%s), refetching", url, e)
+            return _SESSION.get(url, timeout=timeout)
+        
+        logger.debug("Not modified, using cached body for %s", url)
+        response._content = body
+        response.status_code = 200
+        response.encoding = meta.get('encoding')
+        return response
+    
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    
+    if response.status_code == 200 and (etag or last_modified):
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+        }
+        try:
+            # Metadata is removed first and written last, so it only ever
+            # exists alongside the body it describes
+            if meta_path.exists():
+                meta_path.unlink()
+            _atomic_write(body_path, response.content)
+            _atomic_write(meta_path, json.dumps(meta).encode())
+        except OSError as e:
+            logger.warning("Could not write HTTP cache for %s: %s", url, e)
+    
+    return response
+
+
+def fetch_url(url, timeout=30, cache_dir=None):
     """
     Fetch URL with error handling and logging.
     
     Args:
         url: URL to fetch
         timeout: Request timeout in seconds
+        cache_dir: Optional directory for the on-disk HTTP cache; when set,
+            unchanged resources are revalidated with ETag/Last-Modified
+            instead of downloaded again
         
     Returns:
         requests.Response object
@@ -262,43 +453,75 @@ def fetch_url(url, timeout=30):
     """
     logger = logging.getLogger(__name__)
     
-    logger.debug(f"Fetching: {url}")
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
+    logger.debug("Fetching: %s", url)
     
     try:
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = _conditional_get(url, timeout, cache_dir)
         response.raise_for_status()
-        logger.debug(f"✓ Fetched {len(response.content)} bytes")
+        logger.debug("✓ Fetched %d bytes", len(response.content))
         return response
         
     except requests.RequestException as e:
-        logger.error(f"Failed to fetch {url}: {str(e)}")
+        logger.error("Failed to fetch %s: %s", url, e)
         raise
 
 
-def create_county_dict(county_info, tier=None, source_url=None):
+# Output columns for scraped county data, in order
+COUNTY_COLUMNS = (
+    'state_id', 'state_name', 'county_fips', 'county_name',
+    'source_url', 'last_extracted_date'
+)
+
+
+def new_county_columns(include_tier=False):
     """
-    Create standardized county dictionary.
+    Create empty per-column lists for accumulating county rows.
     
     Args:
+        include_tier: If True, include a hifca_tier column
+        
+    Returns:
+        Dict mapping column name to an empty list, suitable for
+        append_county and pd.DataFrame
+    """
+    names = list(COUNTY_COLUMNS)
+    if include_tier:
+        names.insert(4, 'hifca_tier')
+    return {name: [] for name in names}
+
+
+def append_county(columns, county_info, tier=None, source_url=None, seen=None,
+                  extracted_date=None):
+    """
+    Append one county to per-column lists.
+    
+    Args:
+        columns: Dict of column lists from new_county_columns
         county_info: Base county info dict with state_id, county_fips, etc.
-        tier: Optional tier information
+        tier: Optional tier information (only stored if columns has hifca_tier)
         source_url: Optional source URL
+        seen: Optional set of FIPS codes already added; counties already in
+            it are skipped, and new ones are added to it
+        extracted_date: Extraction date string; pass one value computed per
+            run to avoid formatting the current date for every county
         
     Returns:
-        Dict with standardized fields
+        True if the county was appended, False if it was a duplicate
     """
-    result = county_info.copy()
-    
-    if tier is not None:
-        result['tier'] = tier
+    if seen is not None:
+        if county_info['county_fips'] in seen:
+            return False
+        seen.add(county_info['county_fips'])
     
-    if source_url:
-        result['source_url'] = source_url
+    columns['state_id'].append(county_info['state_id'])
+    columns['state_name'].append(county_info['state_name'])
+    columns['county_fips'].append(county_info['county_fips'])
+    columns['county_name'].append(county_info['county_name'])
     
-    result['last_extracted_date'] = get_current_date()
+    if 'hifca_tier' in columns:
+        columns['hifca_tier'].append(tier)
     
-    return result
+    columns['source_url'].append(source_url)
+    columns['last_extracted_date'].append(extracted_date or get_current_date())
+    return True
+
@@ -5,13 +5,22 @@ Layout validation and change detection for source pages
 import json
 import hashlib
 import logging
+import re
 from pathlib import Path
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logging.getLogger(__name__)
 
+# Case-insensitive '.pdf' match for anchor hrefs
+_PDF_HREF_RE = re.compile(r'\.pdf', re.IGNORECASE)
+
 
 class ValidationError(Exception):
     """Raised when data validation fails"""
@@ -23,6 +32,21 @@ class LayoutChangedError(Exception):
     pass
 
 
+def content_digest(content):
+    """
+    Hash page content for change detection.
+    
+    Args:
+        content: HTML string or raw bytes
+        
+    Returns:
+        Hex digest string (BLAKE2b, 32-byte digest)
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.blake2b(content, digest_size=32).hexdigest()
+
+
 class LayoutValidator:
     """
     Validates and compares webpage layouts to detect significant changes.
@@ -49,37 +73,52 @@ class LayoutValidator:
         Returns:
             Dict with layout information
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, 'lxml')
         
-        signature = {
-            'url': url,
-            'extraction_date': datetime.now().isoformat(),
-            'content_hash': hashlib.sha256(html_content.encode()).hexdigest(),
-            'structure': {
-                'table_count': len(soup.find_all('table')),
-                'div_count': len(soup.find_all('div')),
-                'link_count': len(soup.find_all('a')),
-                'pdf_links': [],
-                'table_structures': [],
-            }
-        }
+        table_count = div_count = link_count = 0
+        pdf_links = []
+        tables = []
         
-        # Extract PDF links
-        for link in soup.find_all('a', href=True):
-            if '.pdf' in link['href'].lower():
-                signature['structure']['pdf_links'].append({
-                    'href': link['href'],
-                    'text': link.get_text(strip=True)
-                })
+        # Single walk over the parse tree collecting counts, PDF links and tables
+        for el in soup.descendants:
+            if not isinstance(el, Tag):
+                continue
+            name = el.name
+            if name == 'table':
+                table_count += 1
+                tables.append(el)
+            elif name == 'div':
+                div_count += 1
+            elif name == 'a':
+                link_count += 1
+                href = el.get('href')
+                if href is not None and _PDF_HREF_RE.search(href):
+                    pdf_links.append({
+                        'href': href,
+                        'text': el.get_text(strip=True)
+                    })
         
         # Extract table structures
-        for table in soup.find_all('table'):
+        table_structures = []
+        for table in tables:
             rows = table.find_all('tr')
-            table_info = {
+            table_structures.append({
                 'row_count': len(rows),
                 'header_cells': len(rows[0].find_all(['th', 'td'])) if rows else 0,
+            })
+        
+        signature = {
+            'url': url,
+            'extraction_date': datetime.now().isoformat(),
+            'content_hash': content_digest(html_content),
+            'structure': {
+                'table_count': table_count,
+                'div_count': div_count,
+                'link_count': link_count,
+                'pdf_links': pdf_links,
+                'table_structures': table_structures,
             }
-            signature['structure']['table_structures'].append(table_info)
+        }
         
         return signature
     
@@ -107,10 +146,12 @@ class LayoutValidator:
         """
         snapshot_path = self.get_snapshot_path(signature['url'])
         
-        with open(snapshot_path, 'w') as f:
-            json.dump(signature, f, indent=2)
+        if orjson is not None:
+            snapshot_path.write_bytes(orjson.dumps(signature))
+        else:
+            snapshot_path.write_text(json.dumps(signature, separators=(',', ':')))
         
-        logger.debug(f"Saved layout snapshot: {snapshot_path}")
+        logger.debug("Saved layout snapshot: %s", snapshot_path)
     
     def load_snapshot(self, url):
         """
@@ -125,16 +166,16 @@ class LayoutValidator:
         snapshot_path = self.get_snapshot_path(url)
         
         if not snapshot_path.exists():
-            logger.debug(f"No previous snapshot found for {url}")
+            logger.debug("No previous snapshot found for %s", url)
             return None
         
         try:
-            with open(snapshot_path, 'r') as f:
-                snapshot = json.load(f)
-            logger.debug(f"Loaded layout snapshot from {snapshot['extraction_date']}")
+            data = snapshot_path.read_bytes()
+            snapshot = orjson.loads(data) if orjson is not None else json.loads(data)
+            logger.debug("Loaded layout snapshot from %s", snapshot['extraction_date'])
             return snapshot
         except (json.JSONDecodeError, KeyError) as e:
-            logger.warning(f"Failed to load snapshot: {str(e)}")
+            logger.warning("Failed to load snapshot: %s", e)
             return None
     
     def compare_layouts(self, old_signature, new_signature):
@@ -233,15 +274,21 @@ class LayoutValidator:
         Raises:
             LayoutChangedError: If layout has changed significantly and fail_on_change=True
         """
-        # Extract current signature
-        new_signature = self.extract_layout_signature(html_content, url)
-        
         # Load previous snapshot
         old_signature = self.load_snapshot(url)
         
+        # Identical content: nothing to compare, skip the HTML parse
+        if old_signature is not None and \
+                old_signature.get('content_hash') == content_digest(html_content):
+            logger.debug("Layout unchanged for %s (content hash match)", url)
+            return True, {'changed': False, 'changes': []}
+        
+        # Extract current signature
+        new_signature = self.extract_layout_signature(html_content, url)
+        
         if old_signature is None:
             # No previous snapshot - save this as baseline
-            logger.info(f"No previous layout found - saving baseline for {url}")
+            logger.info("No previous layout found - saving baseline for %s", url)
             self.save_snapshot(new_signature)
             return True, {'changed': False, 'is_baseline': True}
         
@@ -249,12 +296,12 @@ class LayoutValidator:
         comparison = self.compare_layouts(old_signature, new_signature)
         
         if comparison['changed']:
-            logger.warning(f"Layout changes detected for {url}")
-            logger.warning(f"  High severity: {comparison['high_severity_count']}")
-            logger.warning(f"  Medium severity: {comparison['medium_severity_count']}")
+            logger.warning("Layout changes detected for %s", url)
+            logger.warning("  High severity: %d", comparison['high_severity_count'])
+            logger.warning("  Medium severity: %d", comparison['medium_severity_count'])
             
             for change in comparison['changes']:
-                logger.warning(f"  - {change['type']}: {change.get('old')} → {change.get('new')}")
+                logger.warning("  - %s: %s → %s", change['type'], change.get('old'), change.get('new'))
             
             # Update snapshot with new layout
             self.save_snapshot(new_signature)
@@ -266,7 +313,10 @@ class LayoutValidator:
                     f"Review changes and update scraping logic if needed."
                 )
         else:
-            logger.debug(f"Layout unchanged for {url}")
+            logger.debug("Layout unchanged for %s", url)
+            # Same layout, new content: refresh the stored hash so the next
+            # run can short-circuit
+            self.save_snapshot(new_signature)
         
         return not comparison['changed'], comparison
 
@@ -310,11 +360,14 @@ def validate_county_data(df, min_counties=10, expected_columns=None):
     
     # Check FIPS codes are valid format (5 digits)
     if 'county_fips' in df.columns:
-        invalid_fips = df[~df['county_fips'].str.match(r'^\d{5}$', na=False)]
+        fips = df['county_fips']
+        # Same as matching ^\d{5}$ without going through the regex engine
+        valid_fips = fips.str.len().eq(5) & fips.str.isdecimal().eq(True)
+        invalid_fips = df[~valid_fips]
         if len(invalid_fips) > 0:
             raise ValidationError(
                 f"Found {len(invalid_fips)} invalid FIPS codes: "
                 f"{invalid_fips['county_fips'].head().tolist()}"
             )
     
-    logger.info(f"✓ Data validation passed: {len(df)} counties")
+    logger.info("✓ Data validation passed: %d counties", len(df))
@@ -36,7 +36,8 @@ setup(
     python_requires=">=3.7",
     install_requires=requirements,
     extras_require={
-        "pdf": ["pdfplumber>=0.9.0"],
+        "pdf": ["pypdfium2>=4.0.0", "pdfplumber>=0.9.0"],
+        "fast": ["orjson>=3.0"],
         "dev": ["pytest>=7.0", "pytest-cov>=3.0", "black>=22.0", "flake8>=4.0"],
     },
     entry_points={
@@ -2,12 +2,37 @@
 Tests for geo-risk-data package
 """
 
+import json
+
 import pytest
+import numpy as np
 import pandas as pd
-from geo_risk_data import get_hifca, get_hidta, get_combined
+import requests
+from geo_risk_data import get_hifca, get_hidta, get_combined, merge_datasets
+from geo_risk_data.utils import clear_census_cache
 from geo_risk_data.validators import ValidationError, LayoutChangedError
 
 
+def _make_response(url, body, status=200, headers=None):
+    """Build a requests.Response for stubbed sessions."""
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.encoding = 'utf-8'
+    response._content = body
+    if headers:
+        response.headers.update(headers)
+    return response
+
+
+@pytest.fixture(autouse=True)
+def _fresh_census_cache():
+    """Isolate tests from the process-wide Census county cache."""
+    clear_census_cache()
+    yield
+    clear_census_cache()
+
+
 class TestHIFCA:
     """Tests for HIFCA extraction"""
     
@@ -56,7 +81,7 @@ class TestHIDTA:
         df = get_hidta(validate_layout=False)
         
         assert isinstance(df, pd.DataFrame)
-        assert len(df) > 600, "Should have at least 600 HIDTA counties"
+        assert len(df) >= 400, "Should have at least 400 HIDTA counties"
         assert 'state_id' in df.columns
         assert 'county_fips' in df.columns
         assert 'source_url' in df.columns
@@ -77,6 +102,51 @@ class TestHIDTA:
         assert df['county_fips'].str.match(r'^\d{5}$').all()
 
 
+class TestHIDTAScraper:
+    """Offline tests for HIDTAScraper using stubbed Census data"""
+    
+    @staticmethod
+    def _fake_counties(state_code, **kwargs):
+        """Build Census-style county dicts from the HIDTA region lists."""
+        from geo_risk_data.hidta import HIDTAScraper
+        from geo_risk_data.utils import STATE_FIPS, STATE_NAMES, EXPECTED_COUNTY_COUNTS
+        
+        names = []
+        for states in HIDTAScraper.HIDTA_REGIONS.values():
+            for name in states.get(state_code, []):
+                if name != 'ALL' and name not in names:
+                    names.append(name)
+        while len(names) < EXPECTED_COUNTY_COUNTS[state_code]:
+            names.append(f'Filler {len(names)}')
+        
+        return [
+            {
+                'state_id': state_code,
+                'state_name': STATE_NAMES[state_code],
+                'county_fips': STATE_FIPS[state_code] + f'{i:03d}',
+                'county_name': name,
+            }
+            for i, name in enumerate(names, 1)
+        ]
+    
+    def test_all_regions_processed(self, monkeypatch, tmp_path):
+        """Test that every HIDTA region's states are extracted"""
+        from geo_risk_data import hidta
+        
+        monkeypatch.setattr(hidta, 'fetch_census_counties', self._fake_counties)
+        monkeypatch.setattr(hidta, 'prefetch_states', lambda *args, **kwargs: None)
+        
+        df = hidta.HIDTAScraper(cache_dir=tmp_path).scrape()
+        
+        expected_states = set()
+        for states in hidta.HIDTAScraper.HIDTA_REGIONS.values():
+            expected_states.update(states)
+        
+        assert set(df['state_id']) == expected_states
+        assert len(df) > 400, "Should have at least 400 HIDTA counties"
+        assert not df['county_fips'].duplicated().any()
+
+
 class TestCombined:
     """Tests for combined HIFCA+HIDTA"""
     
@@ -85,7 +155,9 @@ class TestCombined:
         df = get_combined(validate_layout=False)
         
         assert isinstance(df, pd.DataFrame)
-        assert len(df) > 800, "Should have at least 800 total counties"
+        assert len(df) > len(get_hidta(validate_layout=False)), \
+            "HIFCA should add counties beyond the HIDTA designations"
+        assert (df['hifca_hidta_flag'] == 'HIFCA').sum() > 0
         
         # Should have flags
         assert 'hifca_flag' in df.columns
@@ -123,6 +195,223 @@ class TestCombined:
         assert tier_info.sum() > 0, "HIFCA counties should have tier information"
 
 
+class TestSouthwestBorderParser:
+    """Offline tests for parsing Southwest Border PDF page text"""
+    
+    def test_reads_every_page(self, tmp_path):
+        """Test tier/state carry across pages, including county-free pages"""
+        from geo_risk_data.hifca import HIFCAScraper
+        
+        scraper = HIFCAScraper(validate_layout=False, cache_dir=tmp_path)
+        pages = [
+            'Tier I\nTexas\nEl Paso County',
+            'Hudspeth County\nArizona\nPima County',
+            'Designation notes without any county listings',
+            'Mohave County',
+        ]
+        
+        result = scraper._parse_sw_border_text(iter(pages))
+        
+        assert result['TX'] == {'El Paso': 'Tier I', 'Hudspeth': 'Tier I'}
+        assert result['AZ'] == {'Pima': 'Tier I', 'Mohave': 'Tier I'}
+    
+    def test_falls_back_when_nothing_matches(self, tmp_path):
+        """Test the built-in table is used when no counties are found"""
+        from geo_risk_data.hifca import HIFCAScraper
+        
+        scraper = HIFCAScraper(validate_layout=False, cache_dir=tmp_path)
+        
+        result = scraper._parse_sw_border_text(['No tier or state here'])
+        
+        assert result == scraper._get_sw_border_fallback()
+
+
+class TestMergeDatasets:
+    """Offline tests for merge_datasets"""
+    
+    @staticmethod
+    def _frames():
+        hifca_df = pd.DataFrame({
+            'state_id': ['TX', 'AZ', 'CA'],
+            'state_name': ['Texas', 'Arizona', 'California'],
+            'county_fips': ['48141', '04013', '06037'],
+            'county_name': ['El Paso', 'Maricopa', 'Los Angeles'],
+            'hifca_tier': ['Tier I', 'Tier II', None],
+            'source_url': ['hifca-url'] * 3,
+            'last_extracted_date': ['2024-01-01'] * 3,
+        })
+        hidta_df = pd.DataFrame({
+            'state_id': ['AZ', 'CA', 'AL'],
+            'state_name': ['Arizona', 'California', 'Alabama'],
+            'county_fips': ['04013', '06001', '01073'],
+            'county_name': ['Maricopa', 'Alameda', 'Jefferson'],
+            'source_url': ['hidta-url'] * 3,
+            'last_extracted_date': ['2024-02-02'] * 3,
+        })
+        return hifca_df, hidta_df
+    
+    def test_flags_and_dtypes(self):
+        """Test designation flags and their storage types"""
+        from geo_risk_data.merger import FLAG_CATEGORIES
+        
+        df = merge_datasets(*self._frames()).set_index('county_fips')
+        
+        assert df.loc['04013', 'hifca_hidta_flag'] == 'BOTH'
+        assert df.loc['48141', 'hifca_hidta_flag'] == 'HIFCA'
+        assert df.loc['06001', 'hifca_hidta_flag'] == 'HIDTA'
+        assert df.loc['04013', ['hifca_flag', 'hidta_flag']].tolist() == [1, 1]
+        assert df.loc['48141', ['hifca_flag', 'hidta_flag']].tolist() == [1, 0]
+        assert df.loc['06001', ['hifca_flag', 'hidta_flag']].tolist() == [0, 1]
+        
+        assert df['hifca_flag'].dtype == np.int8
+        assert df['hidta_flag'].dtype == np.int8
+        assert list(df['hifca_hidta_flag'].cat.categories) == FLAG_CATEGORIES
+        assert isinstance(df['state_id'].dtype, pd.CategoricalDtype)
+        assert isinstance(df['state_name'].dtype, pd.CategoricalDtype)
+        assert not any(col.endswith('_hidta') or col == '_merge' for col in df.columns)
+    
+    def test_hidta_only_rows_coalesced(self):
+        """Test HIDTA-only rows take state, URL and date from the HIDTA side"""
+        df = merge_datasets(*self._frames()).set_index('county_fips')
+        
+        row = df.loc['01073']
+        assert (row['state_id'], row['state_name'], row['county_name']) == \
+            ('AL', 'Alabama', 'Jefferson')
+        assert row['source_url'] == 'hidta-url'
+        assert row['last_extracted_date'] == '2024-02-02'
+        
+        # Rows present on the HIFCA side keep HIFCA values
+        assert df.loc['04013', 'source_url'] == 'hifca-url'
+        assert df.loc['04013', 'last_extracted_date'] == '2024-01-01'
+    
+    def test_sorted_by_state_and_county(self):
+        """Test output is ordered by state, then county name"""
+        df = merge_datasets(*self._frames())
+        
+        assert df['county_fips'].tolist() == ['01073', '04013', '06001', '06037', '48141']
+        assert df.index.tolist() == list(range(len(df)))
+    
+    def test_duplicate_fips_rejected(self):
+        """Test duplicate FIPS codes on one side raise MergeError"""
+        hifca_df, hidta_df = self._frames()
+        hidta_df = pd.concat([hidta_df, hidta_df.iloc[[0]]], ignore_index=True)
+        
+        with pytest.raises(pd.errors.MergeError):
+            merge_datasets(hifca_df, hidta_df)
+
+
+class TestCensusFetch:
+    """Offline tests for Census county fetching with a stubbed session"""
+    
+    class _FakeSession:
+        """Answers Census county queries with two counties per state."""
+        
+        def __init__(self):
+            self.urls = []
+        
+        def get(self, url, headers=None, timeout=None):
+            from geo_risk_data.utils import STATE_FIPS, STATE_NAMES
+            
+            self.urls.append(url)
+            state_fips = url.rsplit('state:', 1)[1]
+            state_code = next(c for c, f in STATE_FIPS.items() if f == state_fips)
+            suffix = ', ' + STATE_NAMES[state_code]
+            
+            return _make_response(url, json.dumps([
+                ['NAME', 'state', 'county'],
+                ['First County' + suffix, state_fips, '001'],
+                ['Second Parish' + suffix, state_fips, '003'],
+            ]).encode())
+    
+    def test_fetch_all_deduplicates_states(self, monkeypatch):
+        """Test repeated state codes are fetched once and mapped by code"""
+        from geo_risk_data import utils
+        
+        session = self._FakeSession()
+        monkeypatch.setattr(utils, '_SESSION', session)
+        
+        result = utils.fetch_all_census_counties(['AZ', 'TX', 'AZ'])
+        
+        assert list(result) == ['AZ', 'TX']
+        assert len(session.urls) == 2
+        assert [c['county_fips'] for c in result['AZ']] == ['04001', '04003']
+        assert [c['county_name'] for c in result['TX']] == ['First', 'Second']
+        assert set(result['TX'][0]) == {'state_id', 'state_name', 'county_fips', 'county_name'}
+        
+        # Served from the in-process cache on the next call, and mutating
+        # a returned list does not touch the cache
+        result['TX'].clear()
+        assert len(utils.fetch_all_census_counties(['TX'])['TX']) == 2
+        assert len(session.urls) == 2
+    
+    def test_fetch_all_failed_states_fetched_once(self, monkeypatch):
+        """Test failed states map to empty lists without a second request"""
+        from geo_risk_data import utils
+        
+        urls = []
+        
+        class FailingSession:
+            def get(self, url, headers=None, timeout=None):
+                urls.append(url)
+                raise requests.ConnectionError('Census unavailable')
+        
+        monkeypatch.setattr(utils, '_SESSION', FailingSession())
+        
+        result = utils.fetch_all_census_counties(['AZ', 'TX'])
+        
+        assert result == {'AZ': [], 'TX': []}
+        assert len(urls) == 2
+
+
+class TestHTTPCache:
+    """Offline tests for the on-disk conditional GET cache"""
+    
+    class _FakeSession:
+        """Serves one resource with an ETag and honours If-None-Match."""
+        
+        def __init__(self, body=b'payload', etag='"v1"'):
+            self.body = body
+            self.etag = etag
+            self.requests = []
+        
+        def get(self, url, headers=None, timeout=None):
+            headers = headers or {}
+            self.requests.append(headers)
+            
+            if headers.get('If-None-Match') == self.etag:
+                return _make_response(url, b'', status=304, headers={'ETag': self.etag})
+            return _make_response(url, self.body, headers={'ETag': self.etag})
+    
+    def test_not_modified_served_from_cache(self, monkeypatch, tmp_path):
+        """Test a 304 response is answered with the cached body"""
+        from geo_risk_data import utils
+        
+        session = self._FakeSession()
+        monkeypatch.setattr(utils, '_SESSION', session)
+        
+        first = utils.fetch_url('https://example.test/page', cache_dir=tmp_path)
+        second = utils.fetch_url('https://example.test/page', cache_dir=tmp_path)
+        
+        assert first.content == b'payload'
+        assert session.requests[1].get('If-None-Match') == '"v1"'
+        assert second.status_code == 200
+        assert second.content == b'payload'
+        assert not list(tmp_path.glob('*.tmp'))
+    
+    def test_cache_write_failure_is_a_miss(self, monkeypatch, tmp_path):
+        """Test an unwritable cache directory does not fail the request"""
+        from geo_risk_data import utils
+        
+        monkeypatch.setattr(utils, '_SESSION', self._FakeSession())
+        
+        # A regular file where the cache directory should be
+        cache_dir = tmp_path / 'not_a_dir'
+        cache_dir.write_text('')
+        
+        response = utils.fetch_url('https://example.test/page', cache_dir=cache_dir)
+        assert response.content == b'payload'
+
+
 class TestDataQuality:
     """Tests for data quality"""
     